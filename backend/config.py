@@ -1,9 +1,10 @@
-from pydantic_settings import BaseSettings
-from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings, NoDecode
+from pydantic import Field, field_validator
 from pathlib import Path
+from functools import cached_property, lru_cache
 import tempfile
 import os
-from typing import Union, List
+from typing import Annotated, Tuple
 
 class Settings(BaseSettings):
     # App Config
@@ -17,8 +18,9 @@ class Settings(BaseSettings):
     # These defaults allow:
     #   - Local development (localhost)
     #   - Direct backend access from Railway frontend
-    ALLOWED_ORIGINS: Union[List[str], str] = Field(
-        default=[
+    # NoDecode: keep the raw env string so parse_origins can split on commas
+    ALLOWED_ORIGINS: Annotated[Tuple[str, ...], NoDecode] = Field(
+        default=(
             "http://localhost:5173",
             "http://localhost:5174",
             "http://localhost:5175",
@@ -26,7 +28,7 @@ class Settings(BaseSettings):
             "http://localhost:8000",
             # Railway domains - update via ALLOWED_ORIGINS env var in Railway dashboard
             # Format: "https://champdf-production.up.railway.app,https://www.yourdomaincom"
-        ],
+        ),
         description="Allowed CORS origins (comma-separated string or list)"
     )
     
@@ -43,25 +45,27 @@ class Settings(BaseSettings):
     # Paths - Use system temp by default for better cross-platform support
     BASE_TEMP_DIR: Path = Path(tempfile.gettempdir()) / "champdf-backend"
 
-    @model_validator(mode='after')
-    def parse_origins(self) -> 'Settings':
+    @field_validator("ALLOWED_ORIGINS", mode="before")
+    @classmethod
+    def parse_origins(cls, v):
         """Parse comma-separated CORS origins from environment variable"""
-        if isinstance(self.ALLOWED_ORIGINS, str):
-            self.ALLOWED_ORIGINS = [
-                origin.strip()
-                for origin in self.ALLOWED_ORIGINS.split(',')
-                if origin.strip()
-            ]
-        return self
-    
-    @property
+        if isinstance(v, str):
+            return tuple(
+                origin.strip() for origin in v.split(',') if origin.strip()
+            )
+        return tuple(v)
+
+
+    @cached_property
     def UPLOAD_DIR(self) -> Path:
+        """Upload directory, created once on first access."""
         path = self.BASE_TEMP_DIR / "uploads"
         path.mkdir(parents=True, exist_ok=True)
         return path
-        
-    @property
+
+    @cached_property
     def OUTPUT_DIR(self) -> Path:
+        """Output directory, created once on first access."""
         path = self.BASE_TEMP_DIR / "outputs"
         path.mkdir(parents=True, exist_ok=True)
         return path
@@ -73,4 +77,11 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide Settings singleton, created lazily on first use.
+
+    Deferring construction keeps `import config` cheap (no env/.env parsing)
+    for subprocesses and tooling that never touch the settings.
+    """
+    return Settings()
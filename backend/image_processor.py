@@ -1,29 +1,172 @@
 """Background removal service using rembg ML model."""
 import io
+import os
 import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 from PIL import Image
-from rembg import remove
+import onnxruntime
+from rembg import new_session, remove
 import logging
 
+from config import get_settings
+
 logger = logging.getLogger(__name__)
 
+# Optional fast path: PyTurboJPEG decodes JPEG ~3x faster than Pillow's
+# libjpeg path. Install with `pip install PyTurboJPEG` (needs libturbojpeg)
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _turbojpeg = TurboJPEG()
+except Exception:  # not installed, or libturbojpeg missing
+    _turbojpeg = None
+
+_JPEG_MAGIC = b"\xff\xd8\xff"
+
 class ImageProcessor:
     """Handles image background removal using ML."""
 
-    def __init__(self):
-        """Initialize the image processor."""
+    # Format-specific encoder options tuned for speed over maximum
+    # compression: PNG level 1 is ~3-5x faster than the default level 6
+    # for a ~10-20% larger file, WebP method 0 is the fastest encode path
+    SAVE_OPTS = {
+        "png": {"format": "PNG", "compress_level": 1},
+        "webp": {"format": "WEBP", "method": 0, "quality": 90},
+        "jpg": {"format": "JPEG", "quality": 85},
+        "jpeg": {"format": "JPEG", "quality": 85},
+    }
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        """Initialize the image processor.
+
+        Args:
+            executor: Dedicated pool for inference work. When None, the event
+                loop's default executor is used (it is shared with file I/O,
+                so prefer passing the bounded ML pool from the app lifespan).
+        """
+        self.executor = executor
         # Model is auto-downloaded to ~/.u2net on first use
-        logger.info("ImageProcessor initialized - model will download on first use")
+        # Session is created lazily so importing this module stays cheap
+        self._session = None
+        # Reusable encode buffers - multi-MB BytesIO allocations churn the
+        # allocator under bursts, so keep a small LIFO pool of them
+        self._buffer_pool: "queue.LifoQueue[io.BytesIO]" = queue.LifoQueue(
+            maxsize=get_settings().MAX_CONCURRENT_JOBS * 2
+        )
+        logger.info("ImageProcessor initialized - model will load on first use")
+
+    def _acquire_buffer(self) -> io.BytesIO:
+        """Take a buffer from the pool, or allocate one if the pool is empty."""
+        try:
+            return self._buffer_pool.get_nowait()
+        except queue.Empty:
+            return io.BytesIO()
+
+    def _release_buffer(self, buf: io.BytesIO) -> None:
+        """Reset a buffer and return it to the pool (dropped if pool is full)."""
+        buf.seek(0)
+        buf.truncate(0)
+        try:
+            self._buffer_pool.put_nowait(buf)
+        except queue.Full:
+            pass
+
+    def _get_session(self):
+        """Get the shared rembg/ONNX session, creating it on first use."""
+        if self._session is None:
+            logger.info("Loading U2Net session...")
+            # Bound ONNX Runtime's intra-op threads (rembg reads
+            # OMP_NUM_THREADS) so MAX_CONCURRENT_JOBS concurrent inferences
+            # don't each spawn cpu_count worker threads
+            jobs = get_settings().MAX_CONCURRENT_JOBS
+            os.environ.setdefault(
+                "OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // jobs))
+            )
+            # Run on CUDA when onnxruntime-gpu is installed and a GPU is
+            # visible; otherwise stick to the CPU provider
+            providers = [
+                p for p in ("CUDAExecutionProvider", "CPUExecutionProvider")
+                if p in onnxruntime.get_available_providers()
+            ]
+            logger.info(f"ONNX execution providers: {providers}")
+            # Prefer the int8-quantized model when present (see
+            # quantize_model.py): 2-4x faster inference on CPU, ~45MB vs
+            # ~176MB, with negligible quality loss
+            int8_model = (
+                Path(os.getenv("U2NET_HOME", Path.home() / ".u2net"))
+                / "u2net.int8.onnx"
+            )
+            if int8_model.exists():
+                logger.info(f"Using int8-quantized U2Net model: {int8_model}")
+                self._session = new_session(
+                    "u2net_custom", model_path=str(int8_model), providers=providers
+                )
+            else:
+                self._session = new_session("u2net", providers=providers)
+        return self._session
+
+    def warmup(self):
+        """Load the model and run a tiny inference so the first real request is fast."""
+        try:
+            dummy = Image.new("RGB", (8, 8), (255, 255, 255))
+            remove(dummy, session=self._get_session())
+            logger.info("U2Net session warmed up")
+        except Exception as e:
+            logger.warning(f"U2Net warmup failed (model will load on first request): {e}")
+
+    def _remove_sync(self, input_bytes: "bytes | bytearray", output_format: str = "png") -> bytes:
+        """Synchronous decode + inference + encode; runs in a worker thread."""
+        # Load input image (TurboJPEG fast path for JPEGs when available)
+        input_image = None
+        if _turbojpeg is not None and input_bytes[:3] == _JPEG_MAGIC:
+            try:
+                input_image = Image.fromarray(
+                    _turbojpeg.decode(bytes(input_bytes), pixel_format=TJPF_RGB)
+                )
+            except Exception as e:
+                logger.warning(f"TurboJPEG decode failed, falling back to Pillow: {e}")
+        if input_image is None:
+            input_image = Image.open(io.BytesIO(input_bytes))
+        logger.info(f"Processing image: {input_image.size} - {input_image.mode}")
+
+        # Remove background using rembg with the shared session
+        # (U2Net model, automatic download ~176MB first run)
+        output_image = remove(input_image, session=self._get_session())
+
+        # Convert to bytes with the fast encoder settings for the format
+        save_opts = self.SAVE_OPTS.get(
+            output_format.lower(), {"format": output_format.upper()}
+        )
+        if save_opts.get("format") == "JPEG" and output_image.mode == "RGBA":
+            # JPEG has no alpha channel - composite against white once
+            background = Image.new("RGB", output_image.size, (255, 255, 255))
+            background.paste(output_image, mask=output_image.split()[3])
+            output_image = background
+        output_buffer = self._acquire_buffer()
+        try:
+            output_image.save(output_buffer, **save_opts)
+            # Copy out of the pooled buffer (via the getbuffer() view, still
+            # a single copy) so it can be reset and reused immediately
+            output_bytes = bytes(output_buffer.getbuffer())
+        finally:
+            self._release_buffer(output_buffer)
+
+        logger.info(f"Background removed successfully - output size: {len(output_bytes)} bytes")
+        return output_bytes
 
     async def remove_background(
         self,
-        input_bytes: bytes,
+        input_bytes: "bytes | bytearray",
         output_format: str = "png"
     ) -> bytes:
         """
         Remove background from image using rembg ML model.
 
+        The whole decode/inference/encode pipeline is CPU-bound, so it runs in
+        a worker thread to keep the event loop responsive.
+
         Args:
             input_bytes: Input image bytes (PNG, JPG, WebP, etc.)
             output_format: Output format (default: png)
@@ -32,23 +175,10 @@ class ImageProcessor:
             Processed image bytes with transparent background
         """
         try:
-            # Load input image
-            input_image = Image.open(io.BytesIO(input_bytes))
-            logger.info(f"Processing image: {input_image.size} - {input_image.mode}")
-
-            # Remove background using rembg
-            # This uses the U2Net model (automatic download ~176MB first run)
-            # Run blocking CPU-bound task in a separate thread
-            output_image = await asyncio.to_thread(remove, input_image)
-
-            # Convert to bytes
-            output_buffer = io.BytesIO()
-            output_image.save(output_buffer, format=output_format.upper())
-            output_bytes = output_buffer.getvalue()
-
-            logger.info(f"Background removed successfully - output size: {len(output_bytes)} bytes")
-            return output_bytes
-
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, self._remove_sync, input_bytes, output_format
+            )
         except Exception as e:
             logger.error(f"Background removal failed: {str(e)}")
             raise RuntimeError(f"Failed to process image: {str(e)}")
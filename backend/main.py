@@ -3,26 +3,31 @@ Video Logo Remover & Rebrander API
 FastAPI backend for processing videos with FFmpeg
 """
 
-import uuid
-import io
+import secrets
 import asyncio
+import hashlib
 import os
 from pathlib import Path
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException, BackgroundTasks
+import orjson
+
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 import aiofiles
 import logging
 
-from config import settings
+from config import get_settings
 from video_processor import VideoProcessor
 from image_processor import ImageProcessor
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 # Global semaphore to limit concurrency
 # We initialize it in lifespan to ensure event loop is ready
 process_semaphore: Optional[asyncio.Semaphore] = None
@@ -37,6 +42,13 @@ async def lifespan(app: FastAPI):
     global process_semaphore
     process_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_JOBS)
 
+    # Dedicated pool for ML inference, bounded identically to the semaphore,
+    # so CPU-bound inference can't starve the default (file I/O) executor
+    app.state.ml_pool = ThreadPoolExecutor(
+        max_workers=settings.MAX_CONCURRENT_JOBS, thread_name_prefix="ml"
+    )
+    image_processor.executor = app.state.ml_pool
+
     logger.info(f"Starting chamPDF backend...")
     logger.info(f"Concurrency limit: {settings.MAX_CONCURRENT_JOBS} jobs")
     logger.info(f"CORS origins: {settings.ALLOWED_ORIGINS}")
@@ -48,16 +60,28 @@ async def lifespan(app: FastAPI):
     if model_file.exists():
         size_mb = model_file.stat().st_size / (1024**2)
         logger.info(f"✅ U2Net model ready: {model_file} ({size_mb:.1f}MB)")
+        # Warm the shared session so the first request doesn't pay the load cost
+        await asyncio.to_thread(image_processor.warmup)
     else:
         logger.warning(f"⚠️  U2Net model not cached at: {model_file}")
         logger.warning("Model will download on first /api/remove-background request (~176MB)")
 
+    # Logo files don't change at runtime, so stat them exactly once here and
+    # build the /api/presets response bytes (and its ETag) from the cache
+    app.state.preset_availability = {
+        preset: processor.logo_exists(preset)
+        for preset in ("lakeb2b", "champions", "ampliz")
+    }
+    app.state.presets_payload = _build_presets_payload(app.state.preset_availability)
+    app.state.presets_etag = f'"{hashlib.md5(app.state.presets_payload).hexdigest()}"'
+
     logger.info("Backend startup complete - ready to accept connections")
 
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    app.state.ml_pool.shutdown(wait=False)
     # Clean up temp directory on full shutdown (optional, careful in prod)
     # shutil.rmtree(settings.BASE_TEMP_DIR, ignore_errors=True)
 
@@ -65,6 +89,7 @@ app = FastAPI(
     title="Video Logo Remover API",
     description="Remove AI watermarks and rebrand videos with custom logos",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -77,12 +102,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads from the declared Content-Length, before any body
+# bytes are read into Python. The in-handler streaming checks stay as a
+# defense against chunked uploads that omit the header.
+@app.middleware("http")
+async def reject_oversized_requests(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+        return Response(status_code=413, content="Request body too large")
+    return await call_next(request)
+
 # Initialize processors
 processor = VideoProcessor(logo_dir=settings.LOGO_DIR)
 image_processor = ImageProcessor()
 
-# Allowed extensions
-ALLOWED_VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".avi"}
+# Allowed types/extensions and valid form values, built once at import
+ALLOWED_VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".webm", ".avi"})
+ALLOWED_IMAGE_TYPES = frozenset({"image/png", "image/jpeg", "image/jpg", "image/webp"})
+VALID_PRESETS = frozenset({"lakeb2b", "champions", "ampliz", "none"})
+VALID_POSITIONS = frozenset({"bottom-right", "bottom-left", "top-right", "top-left"})
+
+# Upload chunk size: every chunk write is a round-trip through the aiofiles
+# thread pool, so larger chunks mean fewer executor hand-offs per upload
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+
+# Precomputed strings for error messages
+_ALLOWED_IMAGE_TYPES_STR = ", ".join(sorted(ALLOWED_IMAGE_TYPES))
+_ALLOWED_VIDEO_EXTENSIONS_STR = ", ".join(sorted(ALLOWED_VIDEO_EXTENSIONS))
+_VALID_PRESETS_STR = ", ".join(sorted(VALID_PRESETS))
+_VALID_POSITIONS_STR = ", ".join(sorted(VALID_POSITIONS))
+
+def _build_presets_payload(availability: dict) -> bytes:
+    """Serialize the /api/presets response once (logos are static at runtime)."""
+    return orjson.dumps({
+        "presets": [
+            {"id": "lakeb2b", "name": "LakeB2B", "available": availability["lakeb2b"]},
+            {"id": "champions", "name": "Champions Group", "available": availability["champions"]},
+            {"id": "ampliz", "name": "Ampliz", "available": availability["ampliz"]},
+            {"id": "none", "name": "Remove Only (No Logo)", "available": True},
+        ]
+    })
 
 def cleanup_files(*files: Path):
     """Cleanup temporary files after response is sent."""
@@ -100,16 +159,16 @@ async def health_check():
 
 
 @app.get("/api/presets")
-async def get_presets():
-    """Get available logo presets"""
-    return {
-        "presets": [
-            {"id": "lakeb2b", "name": "LakeB2B", "available": processor.logo_exists("lakeb2b")},
-            {"id": "champions", "name": "Champions Group", "available": processor.logo_exists("champions")},
-            {"id": "ampliz", "name": "Ampliz", "available": processor.logo_exists("ampliz")},
-            {"id": "none", "name": "Remove Only (No Logo)", "available": True},
-        ]
-    }
+async def get_presets(request: Request):
+    """Get available logo presets (served from the startup-built payload)"""
+    etag = app.state.presets_etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=app.state.presets_payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "max-age=60"},
+    )
 
 
 @app.post("/api/remove-background")
@@ -125,20 +184,23 @@ async def remove_background(
         raise HTTPException(status_code=503, detail="Server initializing")
 
     # Validate file type
-    allowed_types = ["image/png", "image/jpeg", "image/jpg", "image/webp"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(allowed_types)}"
+            detail=f"Invalid file type. Allowed: {_ALLOWED_IMAGE_TYPES_STR}"
         )
 
-    # Read and validate file size
-    contents = await file.read()
-    if len(contents) > settings.MAX_IMAGE_SIZE_MB * 1024 * 1024:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {settings.MAX_IMAGE_SIZE_MB}MB."
-        )
+    # Stream into a bytearray, validating size as we go (like process_video)
+    # so an oversized upload is rejected without buffering it whole
+    max_bytes = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+    contents = bytearray()
+    while chunk := await file.read(64 * 1024):
+        contents.extend(chunk)
+        if len(contents) > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {settings.MAX_IMAGE_SIZE_MB}MB."
+            )
 
     try:
         # Acquire semaphore to prevent OOM
@@ -149,9 +211,10 @@ async def remove_background(
                 output_format=output_format
             )
 
-        # Return processed image
-        return StreamingResponse(
-            io.BytesIO(output_bytes),
+        # Return processed image in one send - it's already fully in memory,
+        # so chunked streaming would only add iterator overhead
+        return Response(
+            content=output_bytes,
             media_type=f"image/{output_format}",
             headers={
                 "Content-Disposition": f"attachment; filename={file.filename.rsplit('.', 1)[0]}_no_bg.{output_format}"
@@ -172,6 +235,7 @@ async def process_video(
     file: UploadFile = File(...),
     logo_preset: str = Form("lakeb2b"),
     watermark_position: str = Form("bottom-right"),
+    skip_delogo: bool = Form(False),
 ):
     """
     Process a video to remove watermarks and optionally add a new logo.
@@ -185,27 +249,26 @@ async def process_video(
     if file_ext not in ALLOWED_VIDEO_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_VIDEO_EXTENSIONS)}"
+            detail=f"Invalid file type. Allowed: {_ALLOWED_VIDEO_EXTENSIONS_STR}"
         )
 
     # Validate logo preset
-    valid_presets = {"lakeb2b", "champions", "ampliz", "none"}
-    if logo_preset not in valid_presets:
+    if logo_preset not in VALID_PRESETS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid logo preset. Allowed: {', '.join(valid_presets)}"
+            detail=f"Invalid logo preset. Allowed: {_VALID_PRESETS_STR}"
         )
 
     # Validate watermark position
-    valid_positions = {"bottom-right", "bottom-left", "top-right", "top-left"}
-    if watermark_position not in valid_positions:
+    if watermark_position not in VALID_POSITIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid watermark position. Allowed: {', '.join(valid_positions)}"
+            detail=f"Invalid watermark position. Allowed: {_VALID_POSITIONS_STR}"
         )
 
-    # Generate unique filenames
-    job_id = str(uuid.uuid4())
+    # Generate unique filenames (token_hex gives the same 128 bits of entropy
+    # as uuid4 without constructing and formatting a UUID object)
+    job_id = secrets.token_hex(16)
     input_path = settings.UPLOAD_DIR / f"{job_id}{file_ext}"
     output_path = settings.OUTPUT_DIR / f"{job_id}_processed.mp4"
 
@@ -213,7 +276,7 @@ async def process_video(
         # Save uploaded file
         file_size = 0
         async with aiofiles.open(input_path, 'wb') as out_file:
-            while chunk := await file.read(1024 * 1024):  # 1MB chunks
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
                 file_size += len(chunk)
                 if file_size > settings.MAX_FILE_SIZE:
                     # Cleanup immediately if file too large
@@ -232,6 +295,7 @@ async def process_video(
                 output_path=str(output_path),
                 logo_preset=logo_preset,
                 watermark_position=watermark_position,
+                skip_delogo=skip_delogo,
             )
 
         if not success:
@@ -268,9 +332,9 @@ async def cleanup_temp_files():
     import shutil
     try:
         shutil.rmtree(settings.BASE_TEMP_DIR, ignore_errors=True)
-        # Re-create dirs
-        settings.UPLOAD_DIR
-        settings.OUTPUT_DIR
+        # Re-create dirs (paths are cached on Settings, so mkdir explicitly)
+        settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        settings.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
         return {"status": "cleaned"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
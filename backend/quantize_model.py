@@ -0,0 +1,37 @@
+"""
+One-off helper: quantize the cached U2Net ONNX model to int8.
+
+Dynamic int8 quantization shrinks the model from ~176MB to ~45MB and runs
+2-4x faster on typical x86 CPUs (VNNI) with negligible quality loss. Run
+this once after the FP32 model has been downloaded (e.g. during the Docker
+build or on first deploy):
+
+    python quantize_model.py
+
+ImageProcessor picks up the quantized model automatically when it sits next
+to the FP32 one in the U2Net cache directory.
+"""
+import os
+import sys
+from pathlib import Path
+
+
+def quantize(model_dir: Path) -> Path:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    fp32_model = model_dir / "u2net.onnx"
+    int8_model = model_dir / "u2net.int8.onnx"
+
+    if not fp32_model.exists():
+        sys.exit(f"FP32 model not found at {fp32_model} - run the backend once to download it")
+
+    print(f"Quantizing {fp32_model} -> {int8_model} ...")
+    quantize_dynamic(str(fp32_model), str(int8_model), weight_type=QuantType.QUInt8)
+    size_mb = int8_model.stat().st_size / (1024**2)
+    print(f"Done: {int8_model} ({size_mb:.1f}MB)")
+    return int8_model
+
+
+if __name__ == "__main__":
+    cache_dir = Path(os.getenv("U2NET_HOME", Path.home() / ".u2net"))
+    quantize(cache_dir)
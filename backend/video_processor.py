@@ -3,26 +3,111 @@ Video Processor - FFmpeg-based video processing for watermark removal and logo o
 """
 
 import asyncio
+import shutil
 import subprocess
-import json
 import os
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple, Optional, Dict
 
+import orjson
+
+
+def _scan_boxes(f, start: int, end: int):
+    """List the (name, payload_start, box_end) of ISO-BMFF boxes in [start, end)."""
+    boxes = []
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        size = int.from_bytes(header[:4], "big")
+        name = header[4:8]
+        payload = pos + 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                break
+            size = int.from_bytes(large, "big")
+            payload = pos + 16
+        elif size == 0:
+            size = end - pos
+        if size < 8 or pos + size > end:
+            break
+        boxes.append((name, payload, pos + size))
+        pos += size
+    return boxes
+
 
 class VideoProcessor:
     """Handles video processing using FFmpeg"""
 
-    # Watermark regions by resolution (x, y, width, height)
-    # These are approximate regions for NotebookLM and similar AI tool watermarks
-    WATERMARK_REGIONS = {
-        "720p": {"x": 1100, "y": 660, "w": 180, "h": 60},
-        "1080p": {"x": 1700, "y": 1000, "w": 220, "h": 80},
-        "480p": {"x": 700, "y": 440, "w": 140, "h": 40},
-        "4k": {"x": 3600, "y": 2080, "w": 400, "h": 160},
+    # Per-resolution reference frame and watermark size:
+    # resolution key -> (base_width, base_height, region_w, region_h).
+    # Region sizes are approximate for NotebookLM and similar AI tool
+    # watermarks, scaled to the actual frame in _calculate_watermark_region.
+    _RES_TABLE = {
+        "4k": (3840, 2160, 400, 160),
+        "1080p": (1920, 1080, 220, 80),
+        "720p": (1280, 720, 180, 60),
+        "480p": (854, 480, 140, 40),
+    }
+
+    # Watermark anchor per position: (left_anchored, top_anchored).
+    # Anchored edges sit at the 20px margin; the others are measured from
+    # the far edge minus the region size.
+    _POSITION_TABLE = {
+        "bottom-right": (False, False),
+        "bottom-left": (True, False),
+        "top-right": (False, True),
+        "top-left": (True, True),
     }
 
-    def __init__(self, logo_dir: Optional[Path] = None):
+    # Hardware encoder candidates, tried in order. Each entry carries the
+    # encode args, any global args needed before -i, and a filter suffix for
+    # encoders that require frames uploaded to a hardware surface.
+    ENCODER_CANDIDATES = (
+        {
+            "name": "h264_nvenc",
+            "args": ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "19", "-b:v", "0"],
+            "global_args": [],
+            "filter_suffix": "",
+        },
+        {
+            "name": "h264_qsv",
+            "args": ["-c:v", "h264_qsv", "-global_quality", "19"],
+            "global_args": [],
+            "filter_suffix": "",
+        },
+        {
+            "name": "h264_vaapi",
+            "args": ["-c:v", "h264_vaapi", "-qp", "19"],
+            "global_args": ["-vaapi_device", "/dev/dri/renderD128"],
+            "filter_suffix": ",format=nv12,hwupload",
+        },
+    )
+
+    # Width the overlay logo is rendered at
+    LOGO_WIDTH = 120
+
+    # Fragmented, streamable MP4 in a single pass: empty_moov/frag_keyframe
+    # write the moov up front, so FFmpeg skips the +faststart second pass
+    # that rewrites (i.e. doubles the writes of) the whole output file.
+    # Tradeoff: fragmented output, which every current browser/player reads.
+    MOVFLAGS = "+faststart+frag_keyframe+empty_moov"
+
+    # Software fallback - always works when FFmpeg is present
+    # (-threads 0 lets libx264 use all cores within the concurrency budget)
+    SOFTWARE_ENCODER = {
+        "name": "libx264",
+        "args": ["-c:v", "libx264", "-crf", "18", "-preset", "fast", "-threads", "0"],
+        "global_args": [],
+        "filter_suffix": "",
+    }
+
+    def __init__(self, logo_dir: Optional[Path] = None, max_concurrency: Optional[int] = None):
         # Check multiple possible logo locations
         # 1. Passed argument (highest priority)
         # 2. Environment variable
@@ -50,60 +135,241 @@ class VideoProcessor:
             self.logo_dir = Path(__file__).parent / "assets" / "logos"
             self.logo_dir.mkdir(parents=True, exist_ok=True)
 
-    def check_ffmpeg(self) -> bool:
-        """Check if FFmpeg is available"""
+        # Logo files are static at runtime: scan once instead of stat-ing
+        # per call (refresh_logos() exists for hot-reload setups)
+        self._logo_cache: Dict[str, Path] = {}
+        self.refresh_logos()
+
+        # Selected encoder, available filters and ffmpeg presence, probed
+        # lazily on first use
+        self._encoder: Optional[Dict] = None
+        self._filters: Optional[set] = None
+        self._ffmpeg_ok: Optional[bool] = None
+
+        # Bound concurrent encodes so many callers can't oversubscribe the
+        # CPU (or exceed hardware encoder session limits); ffprobe is
+        # I/O-bound, so it gets its own, larger budget
+        self._process_sem = asyncio.Semaphore(
+            max_concurrency or max(1, (os.cpu_count() or 2) // 2)
+        )
+        self._probe_sem = asyncio.Semaphore(16)
+
+        # Logos pre-scaled to overlay width, rendered once per preset
+        self._scaled_logo_cache: Dict[str, Optional[Path]] = {}
+
+    def refresh_logos(self) -> None:
+        """Re-scan the logo directory (logos are otherwise cached at init)."""
+        self._logo_cache = {p.stem: p for p in self.logo_dir.glob("*.png")}
+
+    def _prescaled_logo(self, logo_path: Path) -> Optional[Path]:
+        """Return a 120px-wide pre-rendered copy of the logo, or None.
+
+        The logo is static across jobs, so scaling it inside every filter
+        graph re-ran libpng decode + sws_scale per video. The scaled PNG is
+        rendered once into the temp dir and reused; None means the caller
+        should keep the in-graph scale stage.
+        """
+        key = str(logo_path)
+        if key in self._scaled_logo_cache:
+            return self._scaled_logo_cache[key]
+
+        scaled = None
+        try:
+            from PIL import Image
+            from config import get_settings
+
+            cache_dir = get_settings().BASE_TEMP_DIR / "logos-prescaled"
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            target = cache_dir / logo_path.name
+            if not target.exists() or target.stat().st_mtime < logo_path.stat().st_mtime:
+                with Image.open(logo_path) as img:
+                    height = max(1, round(img.height * self.LOGO_WIDTH / img.width))
+                    img.resize((self.LOGO_WIDTH, height), Image.LANCZOS).save(target)
+            scaled = target
+        except Exception:
+            scaled = None
+
+        self._scaled_logo_cache[key] = scaled
+        return scaled
+
+    def _detect_encoder(self) -> Dict:
+        """Pick the best available H.264 encoder, preferring hardware.
+
+        An encoder appearing in `ffmpeg -encoders` doesn't guarantee the
+        hardware is actually present, so each candidate is verified with a
+        one-frame test encode. The result is cached for the process lifetime.
+        """
+        if self._encoder is not None:
+            return self._encoder
+
+        for candidate in self.ENCODER_CANDIDATES:
+            cmd = [
+                "ffmpeg", "-hide_banner", "-v", "error",
+                *candidate["global_args"],
+                "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+                "-frames:v", "1",
+            ]
+            if candidate["filter_suffix"]:
+                cmd += ["-vf", candidate["filter_suffix"].lstrip(",")]
+            cmd += [*candidate["args"], "-f", "null", "-"]
+            try:
+                result = subprocess.run(cmd, capture_output=True, timeout=15)
+                if result.returncode == 0:
+                    self._encoder = candidate
+                    return self._encoder
+            except Exception:
+                pass
+
+        self._encoder = self.SOFTWARE_ENCODER
+        return self._encoder
+
+    def _detect_filters(self) -> set:
+        """Set of filter names this FFmpeg build ships, cached per process."""
+        if self._filters is not None:
+            return self._filters
         try:
             result = subprocess.run(
-                ["ffmpeg", "-version"],
+                ["ffmpeg", "-hide_banner", "-filters"],
                 capture_output=True,
                 text=True,
-                timeout=5
+                timeout=15
             )
-            return result.returncode == 0
+            self._filters = {
+                parts[1]
+                for line in result.stdout.splitlines()
+                if len(parts := line.split()) > 1
+            }
         except Exception:
-            return False
+            self._filters = set()
+        return self._filters
+
+    def _has_cuda_filters(self) -> bool:
+        """True when the CUDA overlay/scale filter chain can be used."""
+        return {"hwdownload", "hwupload_cuda", "scale_cuda", "overlay_cuda"} <= self._detect_filters()
+
+    def _has_qsv_filters(self) -> bool:
+        """True when the QSV overlay filter chain can be used."""
+        return {"hwdownload", "hwupload", "overlay_qsv"} <= self._detect_filters()
+
+    def check_ffmpeg(self, deep: bool = False) -> bool:
+        """Check if FFmpeg is available (result cached per process).
+
+        The default check is a PATH lookup plus an executable-bit test -
+        orders of magnitude cheaper than spawning ffmpeg. Pass deep=True to
+        actually run `ffmpeg -version` and verify runtime linkage.
+        """
+        if deep:
+            try:
+                result = subprocess.run(
+                    ["ffmpeg", "-version"],
+                    capture_output=True,
+                    text=True,
+                    timeout=5
+                )
+                return result.returncode == 0
+            except Exception:
+                return False
+
+        if self._ffmpeg_ok is None:
+            path = shutil.which("ffmpeg")
+            self._ffmpeg_ok = path is not None and os.access(path, os.X_OK)
+        return self._ffmpeg_ok
 
     def logo_exists(self, preset: str) -> bool:
         """Check if a logo file exists for the given preset"""
         if preset == "none":
             return True
-        logo_path = self.logo_dir / f"{preset}.png"
-        return logo_path.exists()
+        return preset in self._logo_cache
 
     def get_logo_path(self, preset: str) -> Optional[Path]:
         """Get the path to a logo file"""
         if preset == "none":
             return None
-        logo_path = self.logo_dir / f"{preset}.png"
-        return logo_path if logo_path.exists() else None
+        return self._logo_cache.get(preset)
+
+    # First-box names that identify an ISO-BMFF (MP4/MOV) container
+    _ISO_BMFF_BOXES = frozenset({b"ftyp", b"styp", b"moov", b"mdat", b"free", b"skip", b"wide"})
+
+    @classmethod
+    def _probe_mp4(cls, input_path: str) -> Dict:
+        """Read frame dimensions straight from the moov/trak/tkhd boxes.
+
+        Parsing the handful of header boxes takes microseconds versus the
+        ~100ms fork/exec of ffprobe. Returns an ffprobe-shaped dict, or {}
+        when the file isn't ISO-BMFF (caller falls back to ffprobe).
+        """
+        try:
+            file_size = os.path.getsize(input_path)
+            with open(input_path, "rb") as f:
+                top = _scan_boxes(f, 0, file_size)
+                if not top or top[0][0] not in cls._ISO_BMFF_BOXES:
+                    return {}
+                for name, payload, box_end in top:
+                    if name != b"moov":
+                        continue
+                    for tname, tpayload, tend in _scan_boxes(f, payload, box_end):
+                        if tname != b"trak":
+                            continue
+                        for bname, bpayload, bend in _scan_boxes(f, tpayload, tend):
+                            if bname != b"tkhd":
+                                continue
+                            f.seek(bpayload)
+                            body = f.read(bend - bpayload)
+                            if not body:
+                                continue
+                            # tkhd: version/flags, timing fields (v1 uses
+                            # 64-bit times), then layer/matrix/etc, then
+                            # width/height as 16.16 fixed point
+                            offset = 4 + (32 if body[0] == 1 else 20) + 52
+                            if len(body) < offset + 8:
+                                continue
+                            width = int.from_bytes(body[offset:offset + 4], "big") >> 16
+                            height = int.from_bytes(body[offset + 4:offset + 8], "big") >> 16
+                            # Audio-only tracks carry a zero size
+                            if width and height:
+                                return {"streams": [{"codec_type": "video", "width": width, "height": height}]}
+        except OSError:
+            return {}
+        return {}
 
     async def get_video_info(self, input_path: str) -> Dict:
-        """Get video metadata using ffprobe"""
+        """Get video metadata (native MP4 box parse, ffprobe fallback)"""
+        info = await asyncio.to_thread(self._probe_mp4, input_path)
+        if info:
+            return info
+
+        # Only ask ffprobe for the first video stream's dimensions - the
+        # full -show_format/-show_streams dump is much larger and slower
         cmd = [
             "ffprobe",
             "-v", "quiet",
             "-print_format", "json",
-            "-show_format",
-            "-show_streams",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,codec_type",
             input_path
         ]
 
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
+        async with self._probe_sem:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                close_fds=False,
+            )
+            stdout, stderr = await proc.communicate()
 
         if proc.returncode != 0:
             return {}
 
         try:
-            return json.loads(stdout.decode())
-        except json.JSONDecodeError:
+            # orjson takes bytes directly, no decode step
+            return orjson.loads(stdout)
+        except orjson.JSONDecodeError:
             return {}
 
-    def _get_resolution_key(self, width: int, height: int) -> str:
+    @staticmethod
+    def _get_resolution_key(width: int, height: int) -> str:
         """Determine resolution key based on video dimensions"""
         if height >= 2160:
             return "4k"
@@ -114,40 +380,31 @@ class VideoProcessor:
         else:
             return "480p"
 
+    @staticmethod
+    @lru_cache(maxsize=1024)
     def _calculate_watermark_region(
-        self,
         width: int,
         height: int,
         position: str
     ) -> Dict[str, int]:
-        """Calculate watermark region based on video size and position"""
-        resolution = self._get_resolution_key(width, height)
-        base_region = self.WATERMARK_REGIONS.get(resolution, self.WATERMARK_REGIONS["720p"])
-
-        # Scale region based on actual dimensions
-        scale_x = width / (3840 if resolution == "4k" else 1920 if resolution == "1080p" else 1280 if resolution == "720p" else 854)
-        scale_y = height / (2160 if resolution == "4k" else 1080 if resolution == "1080p" else 720 if resolution == "720p" else 480)
-
-        region_w = int(base_region["w"] * scale_x)
-        region_h = int(base_region["h"] * scale_y)
-
-        # Calculate position
-        if position == "bottom-right":
-            x = width - region_w - 20
-            y = height - region_h - 20
-        elif position == "bottom-left":
-            x = 20
-            y = height - region_h - 20
-        elif position == "top-right":
-            x = width - region_w - 20
-            y = 20
-        elif position == "top-left":
-            x = 20
-            y = 20
-        else:
-            # Default to bottom-right
-            x = width - region_w - 20
-            y = height - region_h - 20
+        """Calculate watermark region based on video size and position.
+
+        Pure arithmetic over a tiny input space (a handful of resolutions x
+        4 positions), so results are memoized for batch pipelines that call
+        this per clip.
+        """
+        resolution = VideoProcessor._get_resolution_key(width, height)
+        base_w, base_h, ref_w, ref_h = VideoProcessor._RES_TABLE[resolution]
+
+        # Scale the reference region to the actual frame size
+        region_w = int(ref_w * width / base_w)
+        region_h = int(ref_h * height / base_h)
+
+        left, top = VideoProcessor._POSITION_TABLE.get(
+            position, VideoProcessor._POSITION_TABLE["bottom-right"]
+        )
+        x = 20 if left else width - region_w - 20
+        y = 20 if top else height - region_h - 20
 
         return {"x": max(0, x), "y": max(0, y), "w": region_w, "h": region_h}
 
@@ -167,6 +424,7 @@ class VideoProcessor:
         output_path: str,
         logo_preset: str = "lakeb2b",
         watermark_position: str = "bottom-right",
+        skip_delogo: bool = False,
     ) -> Tuple[bool, Optional[str]]:
         """
         Process video to remove watermark and optionally add logo.
@@ -176,104 +434,227 @@ class VideoProcessor:
             output_path: Path for output video
             logo_preset: Logo to add (lakeb2b, champions, ampliz, none)
             watermark_position: Position of original watermark
+            skip_delogo: With logo_preset "none", skip watermark removal too
+                and remux via stream copy (no re-encode, near-instant)
 
         Returns:
             Tuple of (success, error_message)
         """
-        try:
-            # Get video info
-            info = await self.get_video_info(input_path)
-            if not info:
-                return False, "Could not read video metadata"
-
-            # Find video stream
-            video_stream = None
-            for stream in info.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    video_stream = stream
-                    break
-
-            if not video_stream:
-                return False, "No video stream found"
-
-            width = video_stream.get("width", 1280)
-            height = video_stream.get("height", 720)
-
-            # Calculate watermark region
-            region = self._calculate_watermark_region(width, height, watermark_position)
-
-            # Build FFmpeg command
-            logo_path = self.get_logo_path(logo_preset)
-            logo_position = self._get_logo_position(watermark_position)
-
-            if logo_path:
-                # Delogo + overlay new logo
-                filter_complex = (
-                    f"[0:v]delogo=x={region['x']}:y={region['y']}:w={region['w']}:h={region['h']}:show=0[delogoed];"
-                    f"[1:v]scale=120:-1[logo];"
-                    f"[delogoed][logo]overlay={logo_position}:format=auto[out]"
-                )
-                cmd = [
-                    "ffmpeg",
-                    "-y",  # Overwrite output
-                    "-i", input_path,
-                    "-i", str(logo_path),
-                    "-filter_complex", filter_complex,
-                    "-map", "[out]",
-                    "-map", "0:a?",  # Include audio if present
-                    "-c:v", "libx264",
-                    "-crf", "18",
-                    "-preset", "fast",
-                    "-c:a", "copy",
-                    "-movflags", "+faststart",
-                    output_path
-                ]
-            else:
-                # Just delogo, no new logo overlay
-                filter_complex = (
-                    f"delogo=x={region['x']}:y={region['y']}:w={region['w']}:h={region['h']}:show=0"
-                )
-                cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-i", input_path,
-                    "-vf", filter_complex,
-                    "-c:v", "libx264",
-                    "-crf", "18",
-                    "-preset", "fast",
-                    "-c:a", "copy",
-                    "-movflags", "+faststart",
-                    output_path
-                ]
-
-            # Run FFmpeg
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            from config import settings
+        async with self._process_sem:
             try:
-                # Wait for process to complete with timeout
-                stdout, stderr = await asyncio.wait_for(
-                    proc.communicate(),
-                    timeout=settings.PROCESS_TIMEOUT
+                if logo_preset == "none" and skip_delogo:
+                    # Stream-copy fast path: remux only, no decode or
+                    # encode, preserving the original video quality
+                    cmd = [
+                        "ffmpeg",
+                        "-y",
+                        "-i", input_path,
+                        "-c", "copy",
+                        "-movflags", self.MOVFLAGS,
+                        output_path
+                    ]
+                else:
+                    # Numeric watermark region from the actual frame size.
+                    # delogo's x/y/w/h expressions cannot reference the input
+                    # dimensions (w/h there are the filter's own options), so
+                    # the size has to be probed up front - cheap in the common
+                    # case thanks to the native MP4 box parse.
+                    info = await self.get_video_info(input_path)
+                    video_stream = next(
+                        (s for s in info.get("streams", [])
+                         if s.get("codec_type") == "video"),
+                        None,
+                    )
+                    if not video_stream or not video_stream.get("width") or not video_stream.get("height"):
+                        return False, "Could not read video dimensions"
+                    region = self._calculate_watermark_region(
+                        video_stream["width"], video_stream["height"], watermark_position
+                    )
+
+                    # Build FFmpeg command with the best available encoder
+                    # (probe is a subprocess, so keep it off the event loop)
+                    encoder = await asyncio.to_thread(self._detect_encoder)
+                    logo_path = self.get_logo_path(logo_preset)
+                    logo_position = self._get_logo_position(watermark_position)
+
+                    use_cuda = (
+                        logo_path is not None
+                        and encoder["name"] == "h264_nvenc"
+                        and await asyncio.to_thread(self._has_cuda_filters)
+                    )
+
+                    # Feed the pre-rendered logo when available and drop the
+                    # per-job scale stage; fall back to scaling in-graph
+                    scaled_logo = None
+                    if logo_path is not None:
+                        scaled_logo = await asyncio.to_thread(self._prescaled_logo, logo_path)
+                        if scaled_logo is not None:
+                            logo_path = scaled_logo
+
+                    # QSV composite needs the logo already at overlay size
+                    # (no in-graph GPU scale stage is built for it), so it
+                    # requires the pre-rendered copy
+                    use_qsv = (
+                        not use_cuda
+                        and scaled_logo is not None
+                        and encoder["name"] == "h264_qsv"
+                        and await asyncio.to_thread(self._has_qsv_filters)
+                    )
+
+                    if use_cuda:
+                        # All-GPU graph: frames stay in VRAM except for the one
+                        # CPU round-trip delogo needs (it has no CUDA variant)
+                        logo_stage = (
+                            "[1:v]hwupload_cuda[logo];" if scaled_logo is not None
+                            else f"[1:v]hwupload_cuda,scale_cuda={self.LOGO_WIDTH}:-1[logo];"
+                        )
+                        filter_complex = (
+                            f"[0:v]hwdownload,format=nv12,"
+                            f"delogo=x={region['x']}:y={region['y']}:w={region['w']}:h={region['h']}:show=0,"
+                            f"hwupload_cuda[base];"
+                            f"{logo_stage}"
+                            f"[base][logo]overlay_cuda={logo_position}[out]"
+                        )
+                        cmd = [
+                            "ffmpeg",
+                            "-y",  # Overwrite output
+                            "-hwaccel", "cuda",
+                            "-hwaccel_output_format", "cuda",
+                            "-i", input_path,
+                            "-i", str(logo_path),
+                            "-filter_complex", filter_complex,
+                            "-map", "[out]",
+                            "-map", "0:a?",  # Include audio if present
+                            *encoder["args"],
+                            "-c:a", "copy",
+                            "-movflags", self.MOVFLAGS,
+                            output_path
+                        ]
+                    elif use_qsv:
+                        # QSV graph, mirroring the CUDA one: frames stay on
+                        # the GPU except the CPU round-trip delogo needs
+                        filter_complex = (
+                            f"[0:v]hwdownload,format=nv12,"
+                            f"delogo=x={region['x']}:y={region['y']}:w={region['w']}:h={region['h']}:show=0,"
+                            f"hwupload=extra_hw_frames=64[base];"
+                            f"[1:v]hwupload=extra_hw_frames=64[logo];"
+                            f"[base][logo]overlay_qsv={logo_position}[out]"
+                        )
+                        cmd = [
+                            "ffmpeg",
+                            "-y",  # Overwrite output
+                            "-hwaccel", "qsv",
+                            "-hwaccel_output_format", "qsv",
+                            "-i", input_path,
+                            "-i", str(logo_path),
+                            "-filter_complex", filter_complex,
+                            "-map", "[out]",
+                            "-map", "0:a?",  # Include audio if present
+                            *encoder["args"],
+                            "-c:a", "copy",
+                            "-movflags", self.MOVFLAGS,
+                            output_path
+                        ]
+                    elif logo_path:
+                        # Delogo + overlay new logo
+                        logo_stage = (
+                            "[1:v]null[logo];" if scaled_logo is not None
+                            else f"[1:v]scale={self.LOGO_WIDTH}:-1[logo];"
+                        )
+                        filter_complex = (
+                            f"[0:v]delogo=x={region['x']}:y={region['y']}:w={region['w']}:h={region['h']}:show=0[delogoed];"
+                            f"{logo_stage}"
+                            f"[delogoed][logo]overlay={logo_position}:format=auto{encoder['filter_suffix']}[out]"
+                        )
+                        cmd = [
+                            "ffmpeg",
+                            "-y",  # Overwrite output
+                            *encoder["global_args"],
+                            "-i", input_path,
+                            "-i", str(logo_path),
+                            "-filter_complex", filter_complex,
+                            "-map", "[out]",
+                            "-map", "0:a?",  # Include audio if present
+                            *encoder["args"],
+                            "-c:a", "copy",
+                            "-movflags", self.MOVFLAGS,
+                            output_path
+                        ]
+                    else:
+                        # Just delogo, no new logo overlay
+                        filter_complex = (
+                            f"delogo=x={region['x']}:y={region['y']}:w={region['w']}:h={region['h']}:show=0"
+                            f"{encoder['filter_suffix']}"
+                        )
+                        cmd = [
+                            "ffmpeg",
+                            "-y",
+                            *encoder["global_args"],
+                            "-i", input_path,
+                            "-vf", filter_complex,
+                            *encoder["args"],
+                            "-c:a", "copy",
+                            "-movflags", self.MOVFLAGS,
+                            output_path
+                        ]
+
+                # Run FFmpeg. Nothing reads stdout, and stderr is streamed
+                # into a bounded ring buffer so a long encode's progress
+                # lines never accumulate in memory - only the tail is kept
+                # for error reporting.
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                    close_fds=False,
                 )
-            except asyncio.TimeoutError:
-                proc.kill()
-                await proc.communicate()
-                return False, f"Processing timed out after {settings.PROCESS_TIMEOUT} seconds"
-
-            if proc.returncode != 0:
-                error_msg = stderr.decode()[-500:] if stderr else "Unknown error"
-                return False, f"FFmpeg error: {error_msg}"
-
-            # Verify output exists
-            if not Path(output_path).exists():
-                return False, "Output file was not created"
-
-            return True, None
-
-        except Exception as e:
-            return False, str(e)
+                stderr_tail: deque = deque(maxlen=20)
+
+                async def _drain_stderr():
+                    # Fixed-size reads: ffmpeg progress uses \r, so
+                    # line-based reads could buffer unboundedly
+                    while chunk := await proc.stderr.read(4096):
+                        stderr_tail.append(chunk)
+                    await proc.wait()
+
+                from config import get_settings
+                settings = get_settings()
+                try:
+                    # Wait for process to complete with timeout
+                    await asyncio.wait_for(
+                        _drain_stderr(),
+                        timeout=settings.PROCESS_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    return False, f"Processing timed out after {settings.PROCESS_TIMEOUT} seconds"
+
+                if proc.returncode != 0:
+                    error_msg = (
+                        b"".join(stderr_tail)[-500:].decode(errors="replace")
+                        if stderr_tail else "Unknown error"
+                    )
+                    return False, f"FFmpeg error: {error_msg}"
+
+                # Verify output exists
+                if not Path(output_path).exists():
+                    return False, "Output file was not created"
+
+                return True, None
+
+            except Exception as e:
+                return False, str(e)
+
+    async def process_batch(self, items) -> list:
+        """Process several videos concurrently.
+
+        Each item is a dict of process() keyword arguments. The jobs run
+        together under the shared concurrency semaphore, so a queue of N
+        short clips keeps up to max_concurrency FFmpeg processes busy
+        instead of paying each clip's startup cost back to back.
+
+        Returns the per-item (success, error) tuples in input order.
+        """
+        return await asyncio.gather(*(self.process(**item) for item in items))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Rebrand helper: rewrite BentoPDF naming to ChamPDF across a source tree.
+
+Usage:
+    python scripts/rebrand.py [root]
+
+Files are scanned in parallel with a process pool. A cheap byte-level
+prefilter (mmap + find) skips the replace work entirely for files
+that contain none of the patterns, which is the overwhelming majority.
+Changed files are rewritten atomically via a tempfile + os.replace.
+"""
+import mmap
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Replacements, applied longest-first so e.g. "BentoPDF" is rewritten as a
+# whole before the bare "Bento" rule can split it
+PATTERNS = {
+    "BentoPDF": "ChamPDF",
+    "bentopdf": "champdf",
+    "Bento": "Cham",
+    "bento": "cham",
+}
+
+# One compiled alternation so the content is scanned once instead of once
+# per pattern; longest-first ordering makes "BentoPDF" win over "Bento".
+# Compiled over bytes: all patterns are ASCII, so replacing at the byte
+# level skips the UTF-8 decode/encode round-trip entirely and works for
+# any ASCII-compatible encoding.
+_BYTE_PATTERNS = {k.encode(): v.encode() for k, v in PATTERNS.items()}
+_RX = re.compile(b"|".join(
+    re.escape(k) for k in sorted(_BYTE_PATTERNS, key=len, reverse=True)
+))
+
+
+def _repl(match: "re.Match[bytes]") -> bytes:
+    return _BYTE_PATTERNS[match.group(0)]
+
+
+# Byte needles for the prefilter; every pattern contains one of these
+PREFILTER_NEEDLES = (b"Bento", b"bento")
+
+# Only files with these extensions are considered
+TEXT_EXTENSIONS = (
+    ".js", ".mjs", ".ts", ".tsx", ".json", ".html", ".css", ".md",
+    ".py", ".yml", ".yaml", ".toml", ".xml", ".svg", ".txt", ".sh", ".conf",
+)
+
+EXCLUDED_DIRS = {
+    ".git", ".hg", ".svn",
+    "node_modules", "vendor", "dist", "build", "target",
+    ".venv", "venv", "__pycache__",
+    ".next", ".turbo", ".cache", ".mypy_cache", ".pytest_cache",
+}
+
+
+def replace_in_file(path: str) -> bool:
+    """Apply the rebrand patterns to one file. Returns True if it changed."""
+    try:
+        with open(path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file - nothing to do
+                return False
+            with mm:
+                if all(mm.find(needle) == -1 for needle in PREFILTER_NEEDLES):
+                    return False
+                raw = mm[:]
+    except OSError:
+        return False
+
+    new_content = _RX.sub(_repl, raw)
+
+    if new_content == raw:
+        return False
+
+    # Atomic rewrite: write a sibling tempfile, then replace
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rebrand-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(new_content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+def collect_files(root: Path) -> list:
+    """Collect (path, inode) for candidate files under root.
+
+    Walks with os.scandir directly instead of os.walk: DirEntry carries the
+    file type and inode from the directory listing itself, so matching files
+    costs no stat() calls at all on Linux.
+    """
+    candidates = []
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDED_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith(TEXT_EXTENSIONS):
+                    candidates.append((entry.path, entry.inode()))
+    return candidates
+
+
+def main() -> int:
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent
+    # Inode order approximates on-disk layout, so the batched reads the
+    # workers issue stay close to sequential instead of seeking randomly
+    # (the inode comes for free from the scandir listing)
+    entries = collect_files(root)
+    entries.sort(key=lambda e: e[1])
+    candidates = [path for path, _ in entries]
+    print(f"Scanning {len(candidates)} files under {root}")
+
+    changed = 0
+    with ProcessPoolExecutor() as executor:
+        for modified in executor.map(replace_in_file, candidates, chunksize=64):
+            changed += modified
+    print(f"Rebranded {changed} files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())